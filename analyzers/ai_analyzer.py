@@ -1,8 +1,12 @@
 """
 AI分析模块 - 使用AI分析每日数据并生成朋友圈文案
 """
+import asyncio
+import hashlib
 import json
+import random
 from datetime import date
+from functools import lru_cache
 from typing import Optional
 
 from ..config import (
@@ -12,6 +16,136 @@ from ..config import (
 from ..utils.helpers import format_minutes
 
 
+# AI SDK 导入较慢，首次调用时才导入，之后复用同一模块
+@lru_cache(maxsize=None)
+def _openai():
+    """导入 openai SDK，不可用时返回 None"""
+    try:
+        import openai
+    except ImportError:
+        return None
+    return openai
+
+
+@lru_cache(maxsize=None)
+def _anthropic():
+    """导入 anthropic SDK，不可用时返回 None"""
+    try:
+        import anthropic
+    except ImportError:
+        return None
+    return anthropic
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """首次批量分析时才导入 NumPy，不可用时返回 None"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+# 本地批量分析时统计矩阵前几列对应的分类（之后依次为当日总时长、平均活跃度）
+_BATCH_CATEGORY_KEYS = ("work", "game", "entertainment")
+
+# 提示词固定部分（角色、分析要求、输出格式），每次调用都相同。
+# 目前约 500 tokens，低于 Anthropic / OpenAI 提示词缓存的最小前缀长度（至少 1024 tokens，
+# 部分模型更长），因此暂时不会命中缓存；前缀增长到超过最小长度后缓存才会生效
+_PROMPT_STATIC_PREFIX = """你是一个友好的生活助手，擅长分析用户的日常活动数据并生成有趣的朋友圈文案。
+用户会提供今日电脑使用数据，请据此生成分析报告和朋友圈文案。
+
+## 分析要求
+请根据用户提供的数据推断：
+1. 心情指数 (1-10分)：基于工作/休闲比例、活跃度推断
+2. 压力指数 (1-10分)：工作时间长+活跃度高=压力大
+3. 今日总结：简短描述今天的状态（1-2句话）
+4. 朋友圈文案：有趣、积极、不暴露隐私的文案（不提及具体工作内容、网站、聊天对象）
+
+## 朋友圈文案要求
+- 长度：2-4行
+- 风格：轻松、有趣、可以带emoji
+- 不要提及：具体工作项目、访问的网站、聊天内容
+- 可以提及：整体状态、效率感受、生活感悟
+- 示例风格：
+  "今日效率指数爆表💪 难得的专注日！"
+  "又是和代码相爱相杀的一天"
+  "工作与摸鱼的平衡艺术 ✨"
+
+## 输出格式（JSON）
+请严格按以下JSON格式输出：
+{
+    "mood_score": 7,
+    "stress_score": 5,
+    "summary": "今天工作效率较高，休息适度",
+    "wechat_post": "今日能量满格🔋\\n效率指数: ★★★★☆\\n充实的一天，晚安💤"
+}
+"""
+
+# 提示词可变部分（当日数据）
+_PROMPT_DATA_TEMPLATE = """请分析以下用户今日电脑使用数据，并生成分析报告和朋友圈文案。
+
+## 今日数据
+- 工作时长: {work_time}
+- 游戏时长: {game_time}
+- 娱乐时长: {entertainment_time}
+- 社交时长: {social_time}
+- 生产力比例: {productivity_ratio}%
+- 休闲比例: {leisure_ratio}%
+- 活跃度分数: {avg_activity:.1f}/100
+"""
+
+# 本地朋友圈文案模板，{work_hours} / {stars} 只在选中的模板上格式化
+_POST_NO_ACTIVITY = "今天好像没怎么用电脑 📱\n难得的数字断联日"
+_POSTS_WORK_HEAVY = (
+    "今日肝度: MAX 💪\n效率指数拉满的一天",
+    "又是被工作填满的一天\n但充实的感觉还不错 ✨",
+    "专注模式: ON\n今日战绩: {work_hours}h+",
+)
+_POSTS_GAME_HEAVY = (
+    "今天的快乐源泉 🎮\n偶尔也要给自己放个假",
+    "工作是为了更好的生活\n游戏是生活的一部分 ✌️",
+    "充电完毕 🔋\n明天继续加油",
+)
+_POSTS_BALANCED = (
+    "工作与摸鱼的平衡艺术 ⚖️\n今天很满意",
+    "认真工作，快乐生活\n这就是成年人的日常",
+    "效率满满的一天 ✨\n劳逸结合才是王道",
+)
+_POSTS_ENTERTAINMENT = (
+    "今日份的放松时光 🎬\n生活需要仪式感",
+    "偷得浮生半日闲 ☕\n享受当下",
+)
+_POSTS_ORDINARY = (
+    "普通但美好的一天 ☀️",
+    "日常进行中...\n一切都是最好的安排",
+    "今日活力值: {stars}",
+)
+
+_JSON_DECODER = json.JSONDecoder()
+# 最多尝试解析的 "{" 个数：每次尝试都可能扫描到文本末尾，限制次数保证整体线性
+_JSON_MAX_ATTEMPTS = 8
+
+
+def _extract_json(text: str) -> dict:
+    """从模型回复中提取第一个JSON对象（支持嵌套，不使用正则）"""
+    start = text.find("{")
+    for _ in range(_JSON_MAX_ATTEMPTS):
+        if start < 0:
+            break
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(text, start)
+            return obj
+        except json.JSONDecodeError:
+            pass
+        except RecursionError:
+            # 嵌套过深，不是正常的分析结果
+            raise ValueError("响应中的JSON嵌套层数过多") from None
+        start = text.find("{", start + 1)
+    raise ValueError("响应中未找到JSON对象")
+
+
 class AIAnalyzer:
     """AI分析器 - 分析数据并生成文案"""
 
@@ -23,6 +157,12 @@ class AIAnalyzer:
             provider: AI提供商 (openai 或 anthropic)
         """
         self.provider = provider or AI_PROVIDER
+        self._rng = random.Random()
+        # AI分析结果缓存：统计数据哈希 -> 分析结果
+        self._cache: dict[str, dict] = {}
+        # SDK客户端懒加载后复用，保持HTTP连接池
+        self._openai_client = None
+        self._anthropic_client = None
 
     def analyze_daily_data(self, daily_stats: dict) -> dict:
         """
@@ -42,123 +182,236 @@ class AIAnalyzer:
                 - summary: 总结文本
                 - wechat_post: 朋友圈文案
         """
-        prompt = self._build_analysis_prompt(daily_stats)
+        if self.provider not in ("openai", "anthropic"):
+            # 降级到本地规则分析
+            return self._local_analysis(daily_stats)
+
+        # 相同数据直接返回缓存结果，避免重复调用AI
+        key = self._stats_key(daily_stats)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
+        prompt = self._dynamic_body(daily_stats)
 
         try:
             if self.provider == "openai":
-                return self._call_openai(prompt)
-            elif self.provider == "anthropic":
-                return self._call_anthropic(prompt)
+                result = self._call_openai(prompt)
             else:
-                # 降级到本地规则分析
-                return self._local_analysis(daily_stats)
+                result = self._call_anthropic(prompt)
         except Exception as e:
             print(f"AI分析失败，使用本地分析: {e}")
             return self._local_analysis(daily_stats)
 
-    def _build_analysis_prompt(self, stats: dict) -> str:
-        """构建AI分析提示词"""
-        category_minutes = stats.get("category_minutes", {})
-        productivity = stats.get("productivity_analysis", {})
-        avg_activity = stats.get("avg_activity_score", 0)
+        self._cache[key] = result
+        return dict(result)
 
-        # 格式化时长
-        work_time = format_minutes(category_minutes.get("work", 0))
-        game_time = format_minutes(category_minutes.get("game", 0))
-        entertainment_time = format_minutes(category_minutes.get("entertainment", 0))
-        social_time = format_minutes(category_minutes.get("social", 0))
+    async def analyze_many(self, stats_list: list[dict], concurrency: int = 8) -> list[dict]:
+        """
+        并发分析多天数据（用于补算/批量重建）
 
-        prompt = f"""请分析以下用户今日电脑使用数据，并生成分析报告和朋友圈文案。
+        Args:
+            stats_list: 每日统计数据列表，格式同 analyze_daily_data
+            concurrency: 最大并发请求数
 
-## 今日数据
-- 工作时长: {work_time}
-- 游戏时长: {game_time}
-- 娱乐时长: {entertainment_time}
-- 社交时长: {social_time}
-- 生产力比例: {productivity.get('productivity_ratio', 0)}%
-- 休闲比例: {productivity.get('leisure_ratio', 0)}%
-- 活跃度分数: {avg_activity:.1f}/100
+        Returns:
+            与 stats_list 顺序一致的分析结果列表
+        """
+        # 异步客户端绑定事件循环，每批创建一个，批内所有请求共用
+        openai = _openai() if self.provider == "openai" else None
+        anthropic = _anthropic() if self.provider == "anthropic" else None
+        if openai:
+            client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+            acall = self._acall_openai
+        elif anthropic:
+            client = anthropic.AsyncAnthropic(**self._anthropic_client_kwargs())
+            acall = self._acall_anthropic
+        else:
+            # 未配置AI或未安装对应SDK，使用本地规则分析
+            return self._local_analysis_many(stats_list)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def analyze_one(stats: dict) -> dict:
+            key = self._stats_key(stats)
+            cached = self._cache.get(key)
+            if cached is not None:
+                return dict(cached)
+
+            async with semaphore:
+                try:
+                    result = await acall(client, self._dynamic_body(stats))
+                except Exception as e:
+                    print(f"AI分析失败，使用本地分析: {e}")
+                    return self._local_analysis(stats)
+
+            self._cache[key] = result
+            return dict(result)
+
+        async with client:
+            return await asyncio.gather(*(analyze_one(stats) for stats in stats_list))
+
+    def _stats_key(self, stats: dict) -> str:
+        """计算统计数据的稳定哈希，作为分析结果的缓存键"""
+        payload = json.dumps(
+            [self.provider, stats], sort_keys=True, default=str, ensure_ascii=False
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
 
-## 分析要求
-请根据以上数据推断：
-1. 心情指数 (1-10分)：基于工作/休闲比例、活跃度推断
-2. 压力指数 (1-10分)：工作时间长+活跃度高=压力大
-3. 今日总结：简短描述今天的状态（1-2句话）
-4. 朋友圈文案：有趣、积极、不暴露隐私的文案（不提及具体工作内容、网站、聊天对象）
+    def _dynamic_body(self, stats: dict) -> str:
+        """构建提示词的可变部分（当日数据）"""
+        category_minutes = stats.get("category_minutes", {})
+        productivity = stats.get("productivity_analysis", {})
 
-## 朋友圈文案要求
-- 长度：2-4行
-- 风格：轻松、有趣、可以带emoji
-- 不要提及：具体工作项目、访问的网站、聊天内容
-- 可以提及：整体状态、效率感受、生活感悟
-- 示例风格：
-  "今日效率指数爆表💪 难得的专注日！"
-  "又是和代码相爱相杀的一天"
-  "工作与摸鱼的平衡艺术 ✨"
+        return _PROMPT_DATA_TEMPLATE.format(
+            work_time=format_minutes(category_minutes.get("work", 0)),
+            game_time=format_minutes(category_minutes.get("game", 0)),
+            entertainment_time=format_minutes(category_minutes.get("entertainment", 0)),
+            social_time=format_minutes(category_minutes.get("social", 0)),
+            productivity_ratio=productivity.get("productivity_ratio", 0),
+            leisure_ratio=productivity.get("leisure_ratio", 0),
+            avg_activity=stats.get("avg_activity_score", 0),
+        )
 
-## 输出格式（JSON）
-请严格按以下JSON格式输出：
-{{
-    "mood_score": 7,
-    "stress_score": 5,
-    "summary": "今天工作效率较高，休息适度",
-    "wechat_post": "今日能量满格🔋\\n效率指数: ★★★★☆\\n充实的一天，晚安💤"
-}}
-"""
-        return prompt
+    def _openai_request(self, prompt: str) -> dict:
+        """构建OpenAI请求参数（同步与异步调用共用）"""
+        return {
+            "model": OPENAI_MODEL,
+            "messages": [
+                {"role": "system", "content": _PROMPT_STATIC_PREFIX},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "response_format": {"type": "json_object"},
+        }
+
+    def _anthropic_request(self, prompt: str) -> dict:
+        """构建Anthropic请求参数（同步与异步调用共用）"""
+        return {
+            "model": ANTHROPIC_MODEL,
+            "max_tokens": 1024,
+            # 固定前缀标记为可缓存；前缀短于模型的最小可缓存长度时该标记不起作用
+            "system": [
+                {
+                    "type": "text",
+                    "text": _PROMPT_STATIC_PREFIX,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+        }
+
+    def _anthropic_client_kwargs(self) -> dict:
+        """Anthropic客户端参数"""
+        client_kwargs = {"api_key": ANTHROPIC_API_KEY}
+        if ANTHROPIC_BASE_URL:
+            client_kwargs["base_url"] = ANTHROPIC_BASE_URL
+        return client_kwargs
+
+    def _get_openai(self):
+        """获取（首次调用时创建）OpenAI客户端"""
+        if self._openai_client is None:
+            openai = _openai()
+            if openai is None:
+                raise ImportError("openai 未安装")
+            self._openai_client = openai.OpenAI(api_key=OPENAI_API_KEY)
+        return self._openai_client
+
+    def _get_anthropic(self):
+        """获取（首次调用时创建）Anthropic客户端"""
+        if self._anthropic_client is None:
+            anthropic = _anthropic()
+            if anthropic is None:
+                raise ImportError("anthropic 未安装")
+            self._anthropic_client = anthropic.Anthropic(**self._anthropic_client_kwargs())
+        return self._anthropic_client
 
     def _call_openai(self, prompt: str) -> dict:
         """调用OpenAI API"""
-        from openai import OpenAI
+        client = self._get_openai()
 
-        client = OpenAI(api_key=OPENAI_API_KEY)
-
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": "你是一个友好的生活助手，擅长分析用户的日常活动数据并生成有趣的朋友圈文案。"},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            response_format={"type": "json_object"}
-        )
+        response = client.chat.completions.create(**self._openai_request(prompt))
 
         result_text = response.choices[0].message.content
-        return json.loads(result_text)
+        return _extract_json(result_text)
 
     def _call_anthropic(self, prompt: str) -> dict:
         """调用Anthropic API"""
-        import anthropic
+        client = self._get_anthropic()
 
-        client_kwargs = {"api_key": ANTHROPIC_API_KEY}
-        if ANTHROPIC_BASE_URL:
-            client_kwargs["base_url"] = ANTHROPIC_BASE_URL
+        response = client.messages.create(**self._anthropic_request(prompt))
 
-        client = anthropic.Anthropic(**client_kwargs)
+        result_text = response.content[0].text
+        return _extract_json(result_text)
+
+    async def _acall_openai(self, client, prompt: str) -> dict:
+        """异步调用OpenAI API"""
+        response = await client.chat.completions.create(**self._openai_request(prompt))
+        return _extract_json(response.choices[0].message.content)
+
+    async def _acall_anthropic(self, client, prompt: str) -> dict:
+        """异步调用Anthropic API"""
+        response = await client.messages.create(**self._anthropic_request(prompt))
+        return _extract_json(response.content[0].text)
+
+    def _local_analysis_many(self, stats_list: list[dict]) -> list[dict]:
+        """本地规则分析多天数据，安装了 NumPy 时分数部分批量计算"""
+        np = _numpy() if stats_list else None
+        if np is None:
+            return [self._local_analysis(stats) for stats in stats_list]
+
+        rows = []
+        for stats in stats_list:
+            category_minutes = stats.get("category_minutes", {})
+            rows.append(
+                [category_minutes.get(key, 0) for key in _BATCH_CATEGORY_KEYS]
+                # 总时长与 _local_analysis 一样包含所有分类（含自定义分类）
+                + [sum(category_minutes.values()), stats.get("avg_activity_score", 0)]
+            )
+        arr = np.array(rows, dtype=np.float64)
+        scores = self._local_analysis_batch(arr)
+
+        return [
+            self._local_analysis(stats, scores=(float(mood), float(stress)))
+            for stats, (mood, stress) in zip(stats_list, scores)
+        ]
+
+    def _local_analysis_batch(self, arr: "np.ndarray") -> "np.ndarray":
+        """
+        批量计算心情、压力分数（规则同 _local_analysis）
 
-        response = client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=1024,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
+        Args:
+            arr: 形状 (N, 5) 的矩阵，列依次为 work, game, entertainment 分钟数、
+                 当日总分钟数和平均活跃度
+
+        Returns:
+            形状 (N, 2) 的矩阵，列依次为心情分数、压力分数（未取整，由 _local_analysis 统一取整）
+        """
+        np = _numpy()
+        total = arr[:, 3]
+        has_data = total > 0
+        safe_total = np.where(has_data, total, 1)
+
+        leisure_ratio = (arr[:, 1] + arr[:, 2]) / safe_total
+        mood = np.where(has_data, np.minimum(10, 5 + leisure_ratio * 5), 5)
+
+        work_ratio = arr[:, 0] / safe_total
+        stress = np.where(
+            has_data, np.minimum(10, 3 + work_ratio * 4 + arr[:, 4] / 25), 3
         )
 
-        result_text = response.content[0].text
-        # 尝试从响应中提取JSON
-        try:
-            # 查找JSON块
-            import re
-            json_match = re.search(r'\{[^{}]*\}', result_text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except Exception:
-            pass
+        return np.column_stack((mood, stress))
 
-        return json.loads(result_text)
+    def _local_analysis(self, stats: dict, scores: tuple = None) -> dict:
+        """
+        本地规则分析（无需API）
 
-    def _local_analysis(self, stats: dict) -> dict:
-        """本地规则分析（无需API）"""
+        Args:
+            stats: 每日统计数据
+            scores: 已批量算好的 (心情分数, 压力分数)，为空时在此计算
+        """
         category_minutes = stats.get("category_minutes", {})
         productivity = stats.get("productivity_analysis", {})
         avg_activity = stats.get("avg_activity_score", 0)
@@ -168,18 +421,16 @@ class AIAnalyzer:
         entertainment = category_minutes.get("entertainment", 0)
         total = sum(category_minutes.values())
 
-        # 计算心情分数
-        if total == 0:
-            mood_score = 5
+        # 计算心情、压力分数
+        if scores is not None:
+            mood_score, stress_score = scores
+        elif total == 0:
+            mood_score, stress_score = 5, 3
         else:
             # 休闲时间多 -> 心情好
             leisure_ratio = (game + entertainment) / total
             mood_score = min(10, 5 + leisure_ratio * 5)
 
-        # 计算压力分数
-        if total == 0:
-            stress_score = 3
-        else:
             # 工作时间长+活跃度高 -> 压力大
             work_ratio = work / total
             stress_score = min(10, 3 + work_ratio * 4 + avg_activity / 25)
@@ -215,44 +466,25 @@ class AIAnalyzer:
         activity: float
     ) -> str:
         """本地生成朋友圈文案"""
-        posts = []
-
         if total == 0:
-            return "今天好像没怎么用电脑 📱\n难得的数字断联日"
-
-        work_hours = work // 60
-        game_hours = game // 60
+            return _POST_NO_ACTIVITY
 
         # 根据不同情况选择文案
         if work > 480:  # 8小时以上工作
-            posts = [
-                f"今日肝度: MAX 💪\n效率指数拉满的一天",
-                "又是被工作填满的一天\n但充实的感觉还不错 ✨",
-                f"专注模式: ON\n今日战绩: {work_hours}h+",
-            ]
+            pool = _POSTS_WORK_HEAVY
         elif game > 180:  # 3小时以上游戏
-            posts = [
-                "今天的快乐源泉 🎮\n偶尔也要给自己放个假",
-                "工作是为了更好的生活\n游戏是生活的一部分 ✌️",
-                "充电完毕 🔋\n明天继续加油",
-            ]
+            pool = _POSTS_GAME_HEAVY
         elif work > 240 and game > 60:  # 工作4小时+游戏1小时
-            posts = [
-                "工作与摸鱼的平衡艺术 ⚖️\n今天很满意",
-                "认真工作，快乐生活\n这就是成年人的日常",
-                f"效率满满的一天 ✨\n劳逸结合才是王道",
-            ]
+            pool = _POSTS_BALANCED
         elif entertainment > 120:  # 娱乐2小时以上
-            posts = [
-                "今日份的放松时光 🎬\n生活需要仪式感",
-                "偷得浮生半日闲 ☕\n享受当下",
-            ]
+            pool = _POSTS_ENTERTAINMENT
         else:
-            posts = [
-                "普通但美好的一天 ☀️",
-                "日常进行中...\n一切都是最好的安排",
-                f"今日活力值: {'⭐' * min(5, int(activity / 20))}",
-            ]
-
-        import random
-        return random.choice(posts)
+            pool = _POSTS_ORDINARY
+
+        template = self._rng.choice(pool)
+        if "{" not in template:
+            return template
+        return template.format(
+            work_hours=work // 60,
+            stars="⭐" * min(5, int(activity / 20)),
+        )
@@ -1,10 +1,28 @@
 """
 应用分类器 - 将应用程序分类为工作、游戏、娱乐等
 """
+import re
+from functools import lru_cache
 from typing import Optional
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 from ..config import APP_CATEGORIES
 
+# 分类匹配优先级（游戏 > 工作 > 娱乐 > 社交 > 浏览）
+_PRIORITY_ORDER = ("game", "work", "entertainment", "social", "browse")
+_PRIORITY_INDEX = {category: index for index, category in enumerate(_PRIORITY_ORDER)}
+
+# 生产力分析使用的分类顺序
+_CATEGORY_KEYS = ("work", "game", "entertainment", "social", "browse", "other")
+
+# 分类结果缓存条目数（同一进程/标题组合会反复出现）
+CATEGORIZE_CACHE_SIZE = 4096
+
 
 class Categorizer:
     """应用分类器"""
@@ -16,13 +34,50 @@ class Categorizer:
         Args:
             custom_categories: 自定义分类规则，会与默认规则合并
         """
-        self.categories = APP_CATEGORIES.copy()
+        # 逐个复制关键词列表，避免修改全局默认规则
+        self.categories = {cat: list(kws) for cat, kws in APP_CATEGORIES.items()}
         if custom_categories:
             for category, keywords in custom_categories.items():
                 if category in self.categories:
                     self.categories[category].extend(keywords)
                 else:
-                    self.categories[category] = keywords
+                    self.categories[category] = list(keywords)
+
+        # 预先转小写，匹配时无需再处理关键词
+        self._categories_lower = {
+            cat: tuple(k.lower() for k in kws) for cat, kws in self.categories.items()
+        }
+
+        self._categorize_cached = lru_cache(maxsize=CATEGORIZE_CACHE_SIZE)(self._categorize)
+        self._build_matcher()
+
+    def _build_matcher(self):
+        """预编译关键词匹配器（Aho-Corasick 自动机，不可用时降级为正则）"""
+        # 规则变化后旧的分类结果失效
+        self._categorize_cached.cache_clear()
+
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for priority, category in enumerate(_PRIORITY_ORDER):
+                for keyword in self._categories_lower.get(category, ()):
+                    # 同一关键词出现在多个分类时保留优先级最高的
+                    existing = self._automaton.get(keyword, None)
+                    if existing is None or priority < existing[0]:
+                        self._automaton.add_word(keyword, (priority, category))
+            if len(self._automaton) > 0:
+                self._automaton.make_automaton()
+            self._pattern = None
+        else:
+            self._automaton = None
+            # 所有分类合并为一个正则，每个分类一个命名分组，按优先级排列；
+            # 零宽前瞻保证每个位置都会被检查，低优先级关键词不会"吃掉"后面的高优先级关键词
+            groups = []
+            for category in _PRIORITY_ORDER:
+                keywords = self._categories_lower.get(category, ())
+                if keywords:
+                    alternation = "|".join(re.escape(k) for k in keywords)
+                    groups.append(f"(?P<{category}>{alternation})")
+            self._pattern = re.compile(f"(?=(?:{'|'.join(groups)}))") if groups else None
 
     def categorize(self, process_name: str, window_title: str = "") -> str:
         """
@@ -35,19 +90,37 @@ class Categorizer:
         Returns:
             分类名称 (work, game, entertainment, social, browse, other)
         """
+        return self._categorize_cached(process_name, window_title)
+
+    def _categorize(self, process_name: str, window_title: str) -> str:
+        """实际的分类逻辑（结果由 categorize 缓存）"""
         # 转小写进行匹配
         process_lower = process_name.lower() if process_name else ""
         title_lower = window_title.lower() if window_title else ""
-        combined = f"{process_lower} {title_lower}"
-
-        # 按优先级检查（游戏 > 工作 > 娱乐 > 社交 > 浏览）
-        priority_order = ["game", "work", "entertainment", "social", "browse"]
-
-        for category in priority_order:
-            keywords = self.categories.get(category, [])
-            for keyword in keywords:
-                if keyword.lower() in combined:
-                    return category
+        combined = process_lower + " " + title_lower
+
+        if self._automaton is not None:
+            # 单次扫描，取命中关键词中优先级最高的分类
+            best = None
+            if self._automaton.kind == ahocorasick.AHOCORASICK:
+                for _, (priority, category) in self._automaton.iter(combined):
+                    if best is None or priority < best[0]:
+                        best = (priority, category)
+                        if priority == 0:
+                            break
+            return best[1] if best else "other"
+
+        if self._pattern is not None:
+            # 单次扫描，取命中关键词中优先级最高的分类
+            best = None
+            for match in self._pattern.finditer(combined):
+                priority = _PRIORITY_INDEX[match.lastgroup]
+                if best is None or priority < best:
+                    best = priority
+                    if priority == 0:
+                        break
+            if best is not None:
+                return _PRIORITY_ORDER[best]
 
         return "other"
 
@@ -67,8 +140,12 @@ class Categorizer:
         """添加自定义关键词"""
         if category not in self.categories:
             self.categories[category] = []
-        if keyword.lower() not in [k.lower() for k in self.categories[category]]:
+        keyword_lower = keyword.lower()
+        keywords_lower = self._categories_lower.get(category, ())
+        if keyword_lower not in keywords_lower:
             self.categories[category].append(keyword)
+            self._categories_lower[category] = keywords_lower + (keyword_lower,)
+            self._build_matcher()
 
     def get_category_emoji(self, category: str) -> str:
         """获取分类的emoji"""
@@ -92,14 +169,11 @@ class Categorizer:
         Returns:
             生产力分析结果
         """
-        work = category_minutes.get("work", 0)
-        game = category_minutes.get("game", 0)
-        entertainment = category_minutes.get("entertainment", 0)
-        social = category_minutes.get("social", 0)
-        browse = category_minutes.get("browse", 0)
-        other = category_minutes.get("other", 0)
-
-        total = work + game + entertainment + social + browse + other
+        get = category_minutes.get
+        values = [get(key, 0) for key in _CATEGORY_KEYS]
+        work, game, entertainment, social, browse, other = values
+
+        total = sum(values)
 
         if total == 0:
             return {
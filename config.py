@@ -20,12 +20,15 @@ AI_PROVIDER = "anthropic"
 WINDOW_CHECK_INTERVAL = 5  # 秒，检测窗口切换的间隔
 INPUT_STATS_INTERVAL = 60  # 秒，统计键鼠活动的间隔
 MIN_ACTIVITY_DURATION = 3  # 秒，最小活动记录时长（过滤短暂切换）
+DB_FLUSH_BATCH_SIZE = 20  # 条，缓冲多少条记录后立即批量写入数据库
+DB_FLUSH_INTERVAL = 5  # 秒，后台批量写入数据库的间隔
 
 # 数据库路径
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), "data", "activity.db")
 
 # 定时任务配置
 DAILY_ANALYSIS_TIME = "00:00"  # 每日分析时间
+SCHEDULER_MAX_WAIT = 300  # 秒，调度器单次等待上限（系统睡眠期间计时会暂停）
 
 # 应用分类规则
 APP_CATEGORIES = {
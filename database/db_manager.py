@@ -3,13 +3,41 @@
 """
 import sqlite3
 import os
-from datetime import datetime, date
-from typing import Optional
+import json
+import threading
+from datetime import datetime, date, timedelta
+from typing import Iterator, Optional
 from contextlib import contextmanager
 
 from ..config import DATABASE_PATH
 
 
+def _adapt_datetime(value: datetime) -> str:
+    """datetime 存为 'YYYY-MM-DD HH:MM:SS' 文本"""
+    return value.isoformat(sep=" ", timespec="seconds")
+
+
+def _adapt_date(value: date) -> str:
+    """date 存为 'YYYY-MM-DD' 文本"""
+    return value.isoformat()
+
+
+# 注册一次，写入时不再走 sqlite3 默认（Python 3.12 起已弃用）的转换逻辑
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(date, _adapt_date)
+
+# 高频写入语句：保持 SQL 文本完全一致，才能命中连接的预编译语句缓存
+INSERT_ACTIVITY_SQL = (
+    "INSERT INTO activities "
+    "(window_title, process_name, category, start_time, end_time, duration_seconds) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+INSERT_ACTIVITY_LEVEL_SQL = (
+    "INSERT INTO activity_levels (timestamp, keyboard_count, mouse_count) "
+    "VALUES (?, ?, ?)"
+)
+
+
 class DatabaseManager:
     """数据库管理器"""
 
@@ -17,25 +45,60 @@ class DatabaseManager:
         self.db_path = db_path or DATABASE_PATH
         # 确保目录存在
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        # 长连接由监控线程、调度线程和托盘线程共用，用锁串行化访问
+        self._lock = threading.Lock()
+        self._conn = self._connect()
         self._init_db()
 
-    @contextmanager
-    def get_connection(self):
-        """获取数据库连接的上下文管理器"""
-        conn = sqlite3.connect(self.db_path)
+    def _connect(self) -> sqlite3.Connection:
+        """创建数据库连接，启用 WAL 等性能相关设置"""
+        # isolation_level=None: 由 get_connection 显式管理事务
+        # cached_statements: 长连接上预编译语句的缓存条目数
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None,
+            cached_statements=256
+        )
         conn.row_factory = sqlite3.Row
-        try:
-            yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # 其他连接（如遍历用的读连接）持有锁时最多等待 5 秒
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        # 页缓存约 20 MB（负数单位为 KiB）
+        conn.execute("PRAGMA cache_size=-20000")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+
+    @contextmanager
+    def get_connection(self, write: bool = False):
+        """
+        获取数据库连接的上下文管理器
+
+        Args:
+            write: 是否为写操作，写操作包在一个显式事务中，出错时回滚
+        """
+        with self._lock:
+            conn = self._conn
+            if not write:
+                yield conn
+                return
+
+            conn.execute("BEGIN")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
 
     def _init_db(self):
         """初始化数据库表"""
-        with self.get_connection() as conn:
+        with self.get_connection(write=True) as conn:
             cursor = conn.cursor()
 
             # 活动记录表
@@ -47,9 +110,14 @@ class DatabaseManager:
                     category TEXT,
                     start_time DATETIME,
                     end_time DATETIME,
-                    duration_seconds INTEGER
+                    duration_seconds INTEGER,
+                    activity_date TEXT GENERATED ALWAYS AS (date(start_time)) VIRTUAL
                 )
             """)
+            # 兼容旧数据库：补充按日期查询用的生成列
+            self._ensure_generated_column(
+                cursor, "activities", "activity_date", "date(start_time)"
+            )
 
             # 活跃度记录表
             cursor.execute("""
@@ -57,9 +125,13 @@ class DatabaseManager:
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     timestamp DATETIME,
                     keyboard_count INTEGER,
-                    mouse_count INTEGER
+                    mouse_count INTEGER,
+                    ts_date TEXT GENERATED ALWAYS AS (date(timestamp)) VIRTUAL
                 )
             """)
+            self._ensure_generated_column(
+                cursor, "activity_levels", "ts_date", "date(timestamp)"
+            )
 
             # 每日汇总表
             cursor.execute("""
@@ -87,10 +159,29 @@ class DatabaseManager:
                 CREATE INDEX IF NOT EXISTS idx_activities_start_time
                 ON activities(start_time)
             """)
+            # 按日期统计用的复合索引：按日期定位，并按分类顺序分组（无需临时排序）
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_activities_date_category
+                ON activities(activity_date, category)
+            """)
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_activity_levels_timestamp
                 ON activity_levels(timestamp)
             """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_activity_levels_date
+                ON activity_levels(ts_date)
+            """)
+
+    @staticmethod
+    def _ensure_generated_column(cursor, table: str, column: str, expression: str):
+        """为已存在的表补充虚拟生成列（表已包含该列时跳过）"""
+        columns = {row["name"] for row in cursor.execute(f"PRAGMA table_xinfo({table})")}
+        if column not in columns:
+            cursor.execute(f"""
+                ALTER TABLE {table}
+                ADD COLUMN {column} TEXT GENERATED ALWAYS AS ({expression}) VIRTUAL
+            """)
 
     def insert_activity(
         self,
@@ -102,13 +193,11 @@ class DatabaseManager:
         duration_seconds: int
     ):
         """插入活动记录"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO activities
+        with self.get_connection(write=True) as conn:
+            conn.execute(
+                INSERT_ACTIVITY_SQL,
                 (window_title, process_name, category, start_time, end_time, duration_seconds)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (window_title, process_name, category, start_time, end_time, duration_seconds))
+            )
 
     def insert_activity_level(
         self,
@@ -117,12 +206,64 @@ class DatabaseManager:
         mouse_count: int
     ):
         """插入活跃度记录"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO activity_levels (timestamp, keyboard_count, mouse_count)
-                VALUES (?, ?, ?)
-            """, (timestamp, keyboard_count, mouse_count))
+        with self.get_connection(write=True) as conn:
+            conn.execute(INSERT_ACTIVITY_LEVEL_SQL, (timestamp, keyboard_count, mouse_count))
+
+    def insert_activities_many(self, rows: list[tuple]):
+        """
+        批量插入活动记录（单个事务）
+
+        Args:
+            rows: (window_title, process_name, category, start_time, end_time, duration_seconds) 元组列表
+        """
+        with self.get_connection(write=True) as conn:
+            conn.executemany(INSERT_ACTIVITY_SQL, rows)
+
+    def insert_activity_levels_many(self, rows: list[tuple]):
+        """
+        批量插入活跃度记录（单个事务）
+
+        Args:
+            rows: (timestamp, keyboard_count, mouse_count) 元组列表
+        """
+        with self.get_connection(write=True) as conn:
+            conn.executemany(INSERT_ACTIVITY_LEVEL_SQL, rows)
+
+    def _iter_query(self, sql: str, params: tuple, batch_size: int = 256) -> Iterator[dict]:
+        """
+        在独立连接上分批读取查询结果
+
+        WAL 模式下读连接不会阻塞写入，遍历期间也不占用共享连接的锁。
+        生成器结束（或被关闭）时连接随之关闭。
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
+
+    def iter_activities_by_date(self, target_date: date) -> Iterator[dict]:
+        """逐条遍历指定日期的活动（不一次性载入内存）"""
+        return self._iter_query("""
+            SELECT * FROM activities
+            WHERE activity_date = ?
+            ORDER BY start_time
+        """, (target_date.isoformat(),))
+
+    def iter_activity_levels_by_date(self, target_date: date) -> Iterator[dict]:
+        """逐条遍历指定日期的活跃度数据（不一次性载入内存）"""
+        return self._iter_query("""
+            SELECT * FROM activity_levels
+            WHERE ts_date = ?
+            ORDER BY timestamp
+        """, (target_date.isoformat(),))
 
     def get_activities_by_date(self, target_date: date) -> list[dict]:
         """获取指定日期的所有活动"""
@@ -130,7 +271,7 @@ class DatabaseManager:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT * FROM activities
-                WHERE DATE(start_time) = ?
+                WHERE activity_date = ?
                 ORDER BY start_time
             """, (target_date.isoformat(),))
             return [dict(row) for row in cursor.fetchall()]
@@ -141,7 +282,7 @@ class DatabaseManager:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT * FROM activity_levels
-                WHERE DATE(timestamp) = ?
+                WHERE ts_date = ?
                 ORDER BY timestamp
             """, (target_date.isoformat(),))
             return [dict(row) for row in cursor.fetchall()]
@@ -153,7 +294,7 @@ class DatabaseManager:
             cursor.execute("""
                 SELECT category, SUM(duration_seconds) / 60 as minutes
                 FROM activities
-                WHERE DATE(start_time) = ?
+                WHERE activity_date = ?
                 GROUP BY category
             """, (target_date.isoformat(),))
             return {row["category"]: row["minutes"] for row in cursor.fetchall()}
@@ -165,13 +306,64 @@ class DatabaseManager:
             cursor.execute("""
                 SELECT process_name, category, SUM(duration_seconds) / 60 as minutes
                 FROM activities
-                WHERE DATE(start_time) = ?
+                WHERE activity_date = ?
                 GROUP BY process_name
                 ORDER BY minutes DESC
                 LIMIT ?
             """, (target_date.isoformat(), limit))
             return [dict(row) for row in cursor.fetchall()]
 
+    def get_daily_rollup(self, target_date: date, top_limit: int = 10) -> dict:
+        """
+        一次查询获取指定日期的分类时长、最常用应用、活动条数和平均活跃度
+
+        Returns:
+            {"category_minutes": {分类: 分钟}, "top_apps": [...],
+             "activity_count": 条数, "avg_activity_score": 平均活跃度}
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                WITH day AS (
+                    SELECT category, process_name, duration_seconds
+                    FROM activities
+                    WHERE activity_date = ?
+                ),
+                cats AS (
+                    SELECT category, SUM(duration_seconds) / 60 as minutes
+                    FROM day
+                    GROUP BY category
+                ),
+                apps AS (
+                    SELECT process_name, category, SUM(duration_seconds) / 60 as minutes
+                    FROM day
+                    GROUP BY process_name
+                    ORDER BY minutes DESC
+                    LIMIT ?
+                ),
+                levels AS (
+                    SELECT AVG(keyboard_count + mouse_count * 0.5) as avg_score
+                    FROM activity_levels
+                    WHERE ts_date = ?
+                )
+                SELECT
+                    (SELECT json_group_object(category, minutes) FROM cats) as category_minutes,
+                    (SELECT json_group_array(json_object(
+                        'process_name', process_name,
+                        'category', category,
+                        'minutes', minutes
+                    )) FROM apps) as top_apps,
+                    (SELECT COUNT(*) FROM day) as activity_count,
+                    (SELECT avg_score FROM levels) as avg_score
+            """, (target_date.isoformat(), top_limit, target_date.isoformat()))
+            row = cursor.fetchone()
+            return {
+                "category_minutes": json.loads(row["category_minutes"]),
+                "top_apps": json.loads(row["top_apps"]),
+                "activity_count": row["activity_count"],
+                "avg_activity_score": row["avg_score"] or 0,
+            }
+
     def get_avg_activity_score_by_date(self, target_date: date) -> float:
         """获取指定日期的平均活跃度分数"""
         with self.get_connection() as conn:
@@ -179,7 +371,7 @@ class DatabaseManager:
             cursor.execute("""
                 SELECT AVG(keyboard_count + mouse_count * 0.5) as avg_score
                 FROM activity_levels
-                WHERE DATE(timestamp) = ?
+                WHERE ts_date = ?
             """, (target_date.isoformat(),))
             result = cursor.fetchone()
             return result["avg_score"] if result and result["avg_score"] else 0
@@ -201,14 +393,27 @@ class DatabaseManager:
         wechat_post: str = None
     ):
         """保存每日汇总"""
-        with self.get_connection() as conn:
+        with self.get_connection(write=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT OR REPLACE INTO daily_summary
+                INSERT INTO daily_summary
                 (date, work_minutes, game_minutes, entertainment_minutes,
                  social_minutes, browse_minutes, other_minutes, total_active_minutes,
                  avg_activity_score, mood_score, stress_score, summary_text, wechat_post)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(date) DO UPDATE SET
+                    work_minutes = excluded.work_minutes,
+                    game_minutes = excluded.game_minutes,
+                    entertainment_minutes = excluded.entertainment_minutes,
+                    social_minutes = excluded.social_minutes,
+                    browse_minutes = excluded.browse_minutes,
+                    other_minutes = excluded.other_minutes,
+                    total_active_minutes = excluded.total_active_minutes,
+                    avg_activity_score = excluded.avg_activity_score,
+                    mood_score = excluded.mood_score,
+                    stress_score = excluded.stress_score,
+                    summary_text = excluded.summary_text,
+                    wechat_post = excluded.wechat_post
             """, (target_date.isoformat(), work_minutes, game_minutes, entertainment_minutes,
                   social_minutes, browse_minutes, other_minutes, total_active_minutes,
                   avg_activity_score, mood_score, stress_score, summary_text, wechat_post))
@@ -236,14 +441,17 @@ class DatabaseManager:
 
     def cleanup_old_data(self, days_to_keep: int = 30):
         """清理旧数据"""
-        with self.get_connection() as conn:
+        # 截止日期在 Python 中算好，直接与时间列比较即可走索引
+        # （'YYYY-MM-DD HH:MM:SS' < 'YYYY-MM-DD' 等价于日期早于截止日）
+        cutoff = (date.today() - timedelta(days=days_to_keep)).isoformat()
+        with self.get_connection(write=True) as conn:
             cursor = conn.cursor()
             # 只保留活动详情30天，汇总数据永久保留
             cursor.execute("""
                 DELETE FROM activities
-                WHERE DATE(start_time) < DATE('now', ? || ' days')
-            """, (f"-{days_to_keep}",))
+                WHERE start_time < ?
+            """, (cutoff,))
             cursor.execute("""
                 DELETE FROM activity_levels
-                WHERE DATE(timestamp) < DATE('now', ? || ' days')
-            """, (f"-{days_to_keep}",))
+                WHERE timestamp < ?
+            """, (cutoff,))
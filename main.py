@@ -6,21 +6,23 @@ import os
 import time
 import threading
 import signal
+import heapq
+from collections import deque
 from datetime import datetime, date, timedelta
-
-import schedule
+from typing import Optional, Callable
 
 # 添加项目路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from DayReview.config import (
     WINDOW_CHECK_INTERVAL, INPUT_STATS_INTERVAL,
-    MIN_ACTIVITY_DURATION, DAILY_ANALYSIS_TIME
+    MIN_ACTIVITY_DURATION, DAILY_ANALYSIS_TIME, SCHEDULER_MAX_WAIT,
+    DB_FLUSH_BATCH_SIZE, DB_FLUSH_INTERVAL
 )
 from DayReview.monitors import WindowMonitor, InputMonitor
 from DayReview.analyzers import Categorizer, AIAnalyzer
 from DayReview.database import DatabaseManager
-from DayReview.notifier import Notifier
+from DayReview.notifier import get_notifier
 from DayReview.notifier.notification import show_daily_report_notification
 
 
@@ -32,7 +34,7 @@ class ActivityMonitorApp:
         self.db = DatabaseManager()
         self.categorizer = Categorizer()
         self.ai_analyzer = AIAnalyzer()
-        self.notifier = Notifier()
+        self.notifier = get_notifier()
 
         # 初始化监控器
         self.window_monitor = WindowMonitor(
@@ -46,8 +48,24 @@ class ActivityMonitorApp:
             on_stats_ready=self._on_input_stats
         )
 
+        # 待写入数据库的记录，由后台线程定期（或攒够一批时）在一个事务中写入
+        self._pending_activities: deque[tuple] = deque()
+        self._pending_levels: deque[tuple] = deque()
+        self._flush_lock = threading.Lock()
+        self._flush_wakeup = threading.Event()
+        self._flusher_stop = threading.Event()
+        self._flusher_thread = None
+
+        # 今日统计缓存：(分钟桶, 统计结果)，同一分钟内重复查看直接返回
+        self._stats_cache: Optional[tuple[int, dict]] = None
+
         self._running = False
+        # 是否已经停止写入线程并关闭数据库（托盘暂停只会把 _running 置为 False）
+        self._closed = False
         self._scheduler_thread = None
+        self._scheduler_stop = threading.Event()
+        # 定时任务堆：(下次触发时间, 序号, 计算下次触发时间的函数, 任务)
+        self._schedule: list[tuple[datetime, int, Callable[[], datetime], Callable]] = []
 
     def _on_window_change(self, activity: dict):
         """窗口切换回调"""
@@ -58,29 +76,73 @@ class ActivityMonitorApp:
                 activity["window_title"]
             )
 
-            # 保存到数据库
-            self.db.insert_activity(
-                window_title=activity["window_title"][:200],  # 限制长度
-                process_name=activity["process_name"],
-                category=category,
-                start_time=activity["start_time"],
-                end_time=activity["end_time"],
-                duration_seconds=activity["duration_seconds"]
+            # 加入写入缓冲
+            row = (
+                activity["window_title"][:200],  # 限制长度
+                activity["process_name"],
+                category,
+                activity["start_time"],
+                activity["end_time"],
+                activity["duration_seconds"]
             )
+            self._pending_activities.append(row)
+            if len(self._pending_activities) >= DB_FLUSH_BATCH_SIZE:
+                self._flush_wakeup.set()
         except Exception as e:
             print(f"记录活动失败: {e}")
 
     def _on_input_stats(self, stats: dict):
         """键鼠统计回调"""
         try:
-            self.db.insert_activity_level(
-                timestamp=stats["timestamp"],
-                keyboard_count=stats["keyboard_count"],
-                mouse_count=stats["mouse_count"]
-            )
+            row = (stats["timestamp"], stats["keyboard_count"], stats["mouse_count"])
+            self._pending_levels.append(row)
+            if len(self._pending_levels) >= DB_FLUSH_BATCH_SIZE:
+                self._flush_wakeup.set()
         except Exception as e:
             print(f"记录活跃度失败: {e}")
 
+    @staticmethod
+    def _drain(pending: deque) -> list[tuple]:
+        """取出缓冲中的全部记录"""
+        rows = []
+        while True:
+            try:
+                rows.append(pending.popleft())
+            except IndexError:
+                return rows
+
+    @staticmethod
+    def _requeue(pending: deque, rows: list[tuple]):
+        """将写入失败的记录按原顺序放回缓冲头部，等待下次重试"""
+        pending.extendleft(reversed(rows))
+
+    def _flush_pending(self):
+        """将缓冲的记录批量写入数据库（写入失败的批次放回缓冲，下次重试）"""
+        with self._flush_lock:
+            activities = self._drain(self._pending_activities)
+            levels = self._drain(self._pending_levels)
+
+            # 两张表各自一个事务，分别处理，避免一方失败导致另一方重复写入
+            if activities:
+                try:
+                    self.db.insert_activities_many(activities)
+                except Exception as e:
+                    self._requeue(self._pending_activities, activities)
+                    print(f"批量写入活动记录失败，{len(activities)} 条记录将在下次重试: {e}")
+            if levels:
+                try:
+                    self.db.insert_activity_levels_many(levels)
+                except Exception as e:
+                    self._requeue(self._pending_levels, levels)
+                    print(f"批量写入活跃度记录失败，{len(levels)} 条记录将在下次重试: {e}")
+
+    def _run_flusher(self):
+        """后台写入线程：每隔 DB_FLUSH_INTERVAL 秒或缓冲攒够一批时写入"""
+        while not self._flusher_stop.is_set():
+            self._flush_wakeup.wait(DB_FLUSH_INTERVAL)
+            self._flush_wakeup.clear()
+            self._flush_pending()
+
     def start(self):
         """启动监控"""
         if self._running:
@@ -89,6 +151,11 @@ class ActivityMonitorApp:
         self._running = True
         print("🚀 DayReview 已启动")
 
+        # 启动后台写入线程
+        self._flusher_stop.clear()
+        self._flusher_thread = threading.Thread(target=self._run_flusher, daemon=True)
+        self._flusher_thread.start()
+
         # 启动监控器
         self.window_monitor.start()
         self.input_monitor.start()
@@ -100,6 +167,7 @@ class ActivityMonitorApp:
         print(f"  ✓ 定时任务已设置 (每日 {DAILY_ANALYSIS_TIME} 生成报告)")
 
         # 启动调度器线程
+        self._scheduler_stop.clear()
         self._scheduler_thread = threading.Thread(
             target=self._run_scheduler,
             daemon=True
@@ -108,30 +176,82 @@ class ActivityMonitorApp:
 
     def stop(self):
         """停止监控"""
-        if not self._running:
+        if self._closed:
             return
 
-        self._running = False
+        # 唤醒并停止调度器线程
+        self._scheduler_stop.set()
+        if self._scheduler_thread:
+            self._scheduler_thread.join(timeout=2)
+            self._scheduler_thread = None
 
-        # 停止监控器
-        self.window_monitor.stop()
-        self.input_monitor.stop()
+        # 停止监控器（托盘暂停时监控器已经停止，不能重复记录最后一个窗口）
+        if self._running:
+            self._running = False
+            self.window_monitor.stop()
+            self.input_monitor.stop()
+
+        # 监控器停止时会产生最后一条记录，停止写入线程并写完缓冲后再关闭数据库
+        self._flusher_stop.set()
+        self._flush_wakeup.set()
+        if self._flusher_thread:
+            self._flusher_thread.join(timeout=5)
+            self._flusher_thread = None
+        self._flush_pending()
+        self.db.close()
+        self._closed = True
 
         print("\n🛑 DayReview 已停止")
 
+    @staticmethod
+    def _next_run_at(at_time: str, weekday: Optional[int] = None) -> datetime:
+        """
+        计算下一次触发时间
+
+        Args:
+            at_time: 触发时刻，格式 HH:MM
+            weekday: 每周触发的星期（0=周一 ... 6=周日），为 None 时每天触发
+
+        Returns:
+            严格晚于当前时间的下一次触发时间
+        """
+        hour, minute = map(int, at_time.split(":"))
+        now = datetime.now()
+        run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if weekday is not None:
+            run_at += timedelta(days=(weekday - now.weekday()) % 7)
+        if run_at <= now:
+            run_at += timedelta(days=1 if weekday is None else 7)
+        return run_at
+
+    def _add_job(self, next_run: Callable[[], datetime], job: Callable):
+        """添加定时任务"""
+        heapq.heappush(self._schedule, (next_run(), len(self._schedule), next_run, job))
+
     def _setup_scheduler(self):
         """设置定时任务"""
+        self._schedule.clear()
+
         # 每日0点生成报告
-        schedule.every().day.at(DAILY_ANALYSIS_TIME).do(self.generate_daily_report)
+        self._add_job(lambda: self._next_run_at(DAILY_ANALYSIS_TIME), self.generate_daily_report)
 
-        # 每周清理旧数据
-        schedule.every().sunday.at("03:00").do(self._cleanup_old_data)
+        # 每周日3点清理旧数据
+        self._add_job(lambda: self._next_run_at("03:00", weekday=6), self._cleanup_old_data)
 
     def _run_scheduler(self):
-        """运行调度器"""
-        while self._running:
-            schedule.run_pending()
-            time.sleep(60)  # 每分钟检查一次
+        """运行调度器：等待到最近一个任务的触发时间，stop() 可立即唤醒"""
+        while self._schedule:
+            run_at, seq, next_run, job = self._schedule[0]
+            delay = (run_at - datetime.now()).total_seconds()
+            if delay > 0:
+                # 等待计时不包含系统睡眠时间，分段等待并按当前时间重新计算，
+                # 睡眠跨过触发时间时唤醒后最多延迟 SCHEDULER_MAX_WAIT 秒
+                if self._scheduler_stop.wait(min(delay, SCHEDULER_MAX_WAIT)):
+                    break
+                continue
+
+            job()
+            heapq.heapreplace(self._schedule, (next_run(), seq, next_run, job))
 
     def _cleanup_old_data(self):
         """清理旧数据"""
@@ -155,22 +275,25 @@ class ActivityMonitorApp:
 
             print(f"\n📊 正在生成 {target_date} 的每日报告...")
 
-            # 获取分类时长
-            category_minutes = self.db.get_category_duration_by_date(target_date)
+            # 先写入缓冲中的记录，保证统计完整
+            self._flush_pending()
+
+            # 一次查询获取分类时长、常用应用和平均活跃度
+            rollup = self.db.get_daily_rollup(target_date)
+            category_minutes = rollup["category_minutes"]
+            avg_activity = rollup["avg_activity_score"]
 
             if not category_minutes:
                 print("  ⚠️ 当日无活动数据")
                 return
 
-            # 获取活跃度
-            avg_activity = self.db.get_avg_activity_score_by_date(target_date)
-
             # 生产力分析
             productivity = self.categorizer.analyze_productivity(category_minutes)
 
             # 准备数据
             daily_stats = {
                 "category_minutes": category_minutes,
+                "top_apps": rollup["top_apps"],
                 "avg_activity_score": avg_activity,
                 "productivity_analysis": productivity,
             }
@@ -220,17 +343,26 @@ class ActivityMonitorApp:
             traceback.print_exc()
 
     def get_today_stats(self) -> dict:
-        """获取今日实时统计"""
+        """获取今日实时统计（按分钟缓存）"""
+        bucket = int(time.time() // 60)
+        cached = self._stats_cache
+        if cached and cached[0] == bucket:
+            return cached[1]
+
+        self._flush_pending()
         today = datetime.now().date()
-        category_minutes = self.db.get_category_duration_by_date(today)
-        avg_activity = self.db.get_avg_activity_score_by_date(today)
+        rollup = self.db.get_daily_rollup(today)
+        category_minutes = rollup["category_minutes"]
+        avg_activity = rollup["avg_activity_score"]
 
-        return {
+        stats = {
             "date": today.isoformat(),
             "category_minutes": category_minutes,
             "avg_activity_score": avg_activity,
             "productivity": self.categorizer.analyze_productivity(category_minutes)
         }
+        self._stats_cache = (bucket, stats)
+        return stats
 
 
 def main():
@@ -1,12 +1,50 @@
 """
 键鼠活动监控模块 - 统计键盘和鼠标活动（不记录具体内容）
 """
+import itertools
+import sys
 import threading
-import time
 from datetime import datetime
-from typing import Optional, Callable
+from typing import TYPE_CHECKING, Optional, Callable
 
-from pynput import keyboard, mouse
+if TYPE_CHECKING:
+    from pynput import keyboard, mouse
+
+# 鼠标移动按此比例采样计数（每10次移动计1次）
+MOUSE_MOVE_SAMPLE = 10
+
+# Windows 鼠标移动消息
+WM_MOUSEMOVE = 0x0200
+
+
+class _EventCounter:
+    """
+    无锁事件计数器
+
+    事件回调只调用 itertools.count 的 next()，在 GIL 下是原子操作，无需加锁；
+    读取时取一次 next() 并扣除基准值（读取本身消耗的一次也记入基准）。
+    读取方需自行串行化。
+    """
+
+    def __init__(self):
+        self._counter = itertools.count()
+        self._base = 0
+        # 热路径直接调用绑定方法
+        self.increment = self._counter.__next__
+
+    def peek(self) -> int:
+        """读取自上次重置以来的次数（不重置）"""
+        value = next(self._counter)
+        count = value - self._base
+        self._base += 1
+        return count
+
+    def take(self) -> int:
+        """读取自上次重置以来的次数并重置"""
+        value = next(self._counter)
+        count = value - self._base
+        self._base = value + 1
+        return count
 
 
 class InputMonitor:
@@ -28,14 +66,15 @@ class InputMonitor:
         self.on_stats_ready = on_stats_ready
 
         self._running = False
-        self._keyboard_listener: Optional[keyboard.Listener] = None
-        self._mouse_listener: Optional[mouse.Listener] = None
+        self._stop_event = threading.Event()
+        self._keyboard_listener: Optional["keyboard.Listener"] = None
+        self._mouse_listener: Optional["mouse.Listener"] = None
         self._stats_thread: Optional[threading.Thread] = None
 
-        # 计数器
-        self._keyboard_count = 0
-        self._mouse_click_count = 0
-        self._mouse_move_count = 0
+        # 计数器（事件回调无锁递增，锁只用于串行化读取）
+        self._keyboard_counter = _EventCounter()
+        self._mouse_click_counter = _EventCounter()
+        self._mouse_move_counter = _EventCounter()
         self._lock = threading.Lock()
 
     def start(self):
@@ -43,7 +82,11 @@ class InputMonitor:
         if self._running:
             return
 
+        # pynput 导入时会加载平台后端，推迟到真正开始监听时
+        from pynput import keyboard, mouse
+
         self._running = True
+        self._stop_event.clear()
         self._reset_counters()
 
         # 启动键盘监听
@@ -53,10 +96,14 @@ class InputMonitor:
         self._keyboard_listener.start()
 
         # 启动鼠标监听
-        self._mouse_listener = mouse.Listener(
-            on_click=self._on_mouse_click,
-            on_move=self._on_mouse_move
-        )
+        mouse_kwargs = {
+            "on_click": self._on_mouse_click,
+            "on_move": self._on_mouse_move,
+        }
+        if sys.platform == "win32":
+            # 在 pynput 转换/分发事件之前过滤鼠标移动
+            mouse_kwargs["win32_event_filter"] = self._win32_mouse_filter
+        self._mouse_listener = mouse.Listener(**mouse_kwargs)
         self._mouse_listener.start()
 
         # 启动统计线程
@@ -65,8 +112,6 @@ class InputMonitor:
 
     def stop(self):
         """停止监控"""
-        self._running = False
-
         if self._keyboard_listener:
             self._keyboard_listener.stop()
             self._keyboard_listener = None
@@ -75,67 +120,99 @@ class InputMonitor:
             self._mouse_listener.stop()
             self._mouse_listener = None
 
+        # 监听已停止，结算最后一个不完整的周期，避免这段时间的活动丢失
+        self.flush_now()
+
+        self._running = False
+        # 唤醒统计线程，不必等满一个统计间隔
+        self._stop_event.set()
+
         if self._stats_thread:
             self._stats_thread.join(timeout=2)
             self._stats_thread = None
 
     def _on_key_press(self, key):
         """键盘按下事件（只计数）"""
-        with self._lock:
-            self._keyboard_count += 1
+        self._keyboard_counter.increment()
 
     def _on_mouse_click(self, x, y, button, pressed):
         """鼠标点击事件（只计数）"""
         if pressed:
-            with self._lock:
-                self._mouse_click_count += 1
+            self._mouse_click_counter.increment()
 
     def _on_mouse_move(self, x, y):
         """鼠标移动事件（采样计数，避免过多）"""
-        # 每10次移动计1次，减少数据量
-        with self._lock:
-            self._mouse_move_count += 0.1
+        self._mouse_move_counter.increment()
+
+    def _win32_mouse_filter(self, msg, data) -> bool:
+        """
+        Windows 鼠标事件过滤器
+
+        鼠标移动在这里直接计数并返回 False，pynput 不再把它转换成事件、
+        投递到监听线程并回调 on_move；其他鼠标事件照常分发。
+        """
+        if msg == WM_MOUSEMOVE:
+            self._mouse_move_counter.increment()
+            return False
+        return True
 
     def _reset_counters(self):
         """重置计数器"""
         with self._lock:
-            self._keyboard_count = 0
-            self._mouse_click_count = 0
-            self._mouse_move_count = 0
+            self._keyboard_counter = _EventCounter()
+            self._mouse_click_counter = _EventCounter()
+            self._mouse_move_counter = _EventCounter()
 
     def _get_and_reset_stats(self) -> dict:
         """获取统计数据并重置"""
         with self._lock:
-            stats = {
+            clicks = self._mouse_click_counter.take()
+            moves = self._mouse_move_counter.take()
+            return {
                 "timestamp": datetime.now(),
-                "keyboard_count": self._keyboard_count,
-                "mouse_count": int(self._mouse_click_count + self._mouse_move_count)
+                "keyboard_count": self._keyboard_counter.take(),
+                "mouse_count": clicks + moves // MOUSE_MOVE_SAMPLE
             }
-            self._keyboard_count = 0
-            self._mouse_click_count = 0
-            self._mouse_move_count = 0
-            return stats
 
     def _stats_loop(self):
         """统计循环"""
         while self._running:
-            time.sleep(self.stats_interval)
-
-            if not self._running:
+            if self._stop_event.wait(self.stats_interval):
                 break
 
-            stats = self._get_and_reset_stats()
+            self._emit_stats()
+
+    def _emit_stats(self) -> dict:
+        """结算统计数据并交给回调"""
+        stats = self._get_and_reset_stats()
 
-            # 调用回调
-            if self.on_stats_ready:
-                self.on_stats_ready(stats)
+        # 调用回调
+        if self.on_stats_ready:
+            self.on_stats_ready(stats)
+        return stats
+
+    def flush_now(self) -> Optional[dict]:
+        """
+        立即结算当前统计（不等待统计间隔）
+
+        结算出的记录只覆盖当前周期已过去的部分，会按一条完整记录参与平均活跃度计算，
+        只应在需要提前结束周期时调用（stop() 会调用一次），查看实时数据请用 get_current_stats。
+
+        Returns:
+            结算的统计数据，未在监控时返回 None
+        """
+        if not self._running:
+            return None
+        return self._emit_stats()
 
     def get_current_stats(self) -> dict:
         """获取当前统计（不重置）"""
         with self._lock:
+            clicks = self._mouse_click_counter.peek()
+            moves = self._mouse_move_counter.peek()
             return {
-                "keyboard_count": self._keyboard_count,
-                "mouse_count": int(self._mouse_click_count + self._mouse_move_count)
+                "keyboard_count": self._keyboard_counter.peek(),
+                "mouse_count": clicks + moves // MOUSE_MOVE_SAMPLE
             }
 
     @property
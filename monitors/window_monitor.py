@@ -1,16 +1,80 @@
 """
 窗口监控模块 - 监控当前活动窗口
 """
+import os
 import threading
-import time
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, Callable
 import ctypes
 from ctypes import wintypes
 
 import win32gui
 import win32process
-import psutil
+
+# 进程名缓存的最大条目数
+PROCESS_NAME_CACHE_SIZE = 256
+
+# 等待监控线程完成初始化（消息队列、事件钩子）的最长时间（秒）
+THREAD_READY_TIMEOUT = 2.0
+
+# SetWinEventHook / 消息循环相关常量
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+OBJID_WINDOW = 0
+WINEVENT_OUTOFCONTEXT = 0x0000
+WM_QUIT = 0x0012
+PM_NOREMOVE = 0x0000
+
+# 进程查询相关常量
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+PROCESS_IMAGE_PATH_SIZE = 1024
+
+
+# 使用独立的 WinDLL 实例声明函数签名，不修改 pynput、pystray 等共用的 ctypes.windll
+@lru_cache(maxsize=None)
+def _kernel32():
+    """获取 kernel32 并声明用到的函数签名（句柄在 64 位下不能按 int 截断）"""
+    kernel32 = ctypes.WinDLL("kernel32")
+    kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.GetProcessTimes.argtypes = [
+        wintypes.HANDLE, ctypes.POINTER(wintypes.FILETIME), ctypes.POINTER(wintypes.FILETIME),
+        ctypes.POINTER(wintypes.FILETIME), ctypes.POINTER(wintypes.FILETIME)
+    ]
+    kernel32.GetProcessTimes.restype = wintypes.BOOL
+    kernel32.QueryFullProcessImageNameW.argtypes = [
+        wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR, ctypes.POINTER(wintypes.DWORD)
+    ]
+    kernel32.QueryFullProcessImageNameW.restype = wintypes.BOOL
+    kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    kernel32.CloseHandle.restype = wintypes.BOOL
+    kernel32.GetCurrentThreadId.restype = wintypes.DWORD
+    return kernel32
+
+
+@lru_cache(maxsize=None)
+def _win_event_proc_type():
+    """WinEvent 回调函数类型"""
+    return ctypes.WINFUNCTYPE(
+        None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+        wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+    )
+
+
+@lru_cache(maxsize=None)
+def _user32():
+    """获取 user32 并声明事件钩子相关的函数签名"""
+    user32 = ctypes.WinDLL("user32")
+    user32.SetWinEventHook.restype = wintypes.HANDLE
+    user32.SetWinEventHook.argtypes = [
+        wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, _win_event_proc_type(),
+        wintypes.DWORD, wintypes.DWORD, wintypes.DWORD
+    ]
+    user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+    user32.UnhookWinEvent.restype = wintypes.BOOL
+    return user32
 
 
 class WindowMonitor:
@@ -26,7 +90,7 @@ class WindowMonitor:
         初始化窗口监控器
 
         Args:
-            check_interval: 检查窗口的间隔（秒）
+            check_interval: 轮询检查窗口的间隔（秒），仅在无法安装前台窗口事件钩子时使用
             min_duration: 最小记录时长（秒），过滤短暂切换
             on_window_change: 窗口切换时的回调函数
         """
@@ -35,9 +99,17 @@ class WindowMonitor:
         self.on_window_change = on_window_change
 
         self._running = False
+        self._stop_event = threading.Event()
         self._thread: Optional[threading.Thread] = None
+        self._thread_id: Optional[int] = None
+        # 监控线程已就绪（_thread_id 与事件钩子已设置）
+        self._ready = threading.Event()
+        # 需要持有回调对象的引用，防止被回收
+        self._win_event_proc = None
         self._current_window: Optional[dict] = None
         self._window_start_time: Optional[datetime] = None
+        # pid -> (进程创建时间, 进程名)，创建时间用于识别 pid 复用
+        self._process_name_cache: OrderedDict[int, tuple[int, str]] = OrderedDict()
 
     def start(self):
         """启动监控"""
@@ -45,42 +117,123 @@ class WindowMonitor:
             return
 
         self._running = True
-        self._thread = threading.Thread(target=self._monitor_loop, daemon=True)
+        self._stop_event.clear()
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
+        # 等线程拿到 _thread_id 并装好钩子再返回，否则紧接着的 stop() 无法投递 WM_QUIT
+        self._ready.wait(THREAD_READY_TIMEOUT)
 
     def stop(self):
         """停止监控"""
         self._running = False
+        self._stop_event.set()
         if self._thread:
+            # 结束事件钩子线程的消息循环
+            if self._thread_id:
+                _user32().PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
             self._thread.join(timeout=2)
             self._thread = None
+            self._thread_id = None
 
         # 记录最后一个窗口
         if self._current_window and self._window_start_time:
             self._record_window_activity()
 
+    def _run(self):
+        """监控线程：优先由前台窗口切换事件驱动，钩子安装失败时退回轮询"""
+        try:
+            user32 = _user32()
+            msg = wintypes.MSG()
+            # 确保本线程已有消息队列，stop() 才能投递 WM_QUIT
+            user32.PeekMessageW(ctypes.byref(msg), None, 0, 0, PM_NOREMOVE)
+            self._thread_id = _kernel32().GetCurrentThreadId()
+
+            # 记录启动时的前台窗口
+            self._check_foreground_window()
+
+            hooks = self._install_foreground_hooks()
+        finally:
+            # 初始化失败也要放行 start()，避免其一直等到超时
+            self._ready.set()
+
+        if not hooks:
+            self._monitor_loop()
+            return
+
+        try:
+            # 阻塞等待消息，只有前台窗口切换或标题变化时才会被唤醒
+            while self._running and user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            for hook in hooks:
+                user32.UnhookWinEvent(hook)
+
+    def _install_foreground_hooks(self) -> list:
+        """
+        安装前台窗口切换与窗口标题变化的事件钩子
+
+        切换到前台时标题可能还是空的（此时不会记录），标题变化事件用于在标题出现后补记。
+
+        Returns:
+            已安装的钩子句柄列表，任一钩子安装失败时返回空列表
+        """
+        user32 = _user32()
+        self._win_event_proc = _win_event_proc_type()(self._on_win_event)
+
+        hooks = []
+        for event in (EVENT_SYSTEM_FOREGROUND, EVENT_OBJECT_NAMECHANGE):
+            hook = user32.SetWinEventHook(
+                event, event, None, self._win_event_proc, 0, 0, WINEVENT_OUTOFCONTEXT
+            )
+            if not hook:
+                # 缺少标题变化钩子时，空标题窗口要等下次切换才能记录，整体改用轮询
+                for installed in hooks:
+                    user32.UnhookWinEvent(installed)
+                return []
+            hooks.append(hook)
+        return hooks
+
+    def _on_win_event(self, hook, event, hwnd, id_object, id_child, thread_id, event_time):
+        """WinEvent 回调（在监控线程的消息循环中执行）"""
+        if event == EVENT_OBJECT_NAMECHANGE:
+            # 标题变化事件很频繁，只处理尚未记录的前台顶层窗口
+            if id_object != OBJID_WINDOW:
+                return
+            if self._current_window and self._current_window["hwnd"] == hwnd:
+                return
+            if hwnd != win32gui.GetForegroundWindow():
+                return
+        self._check_foreground_window()
+
     def _monitor_loop(self):
-        """监控循环"""
+        """轮询循环（事件钩子不可用时使用）"""
         while self._running:
-            try:
-                window_info = self._get_active_window_info()
+            self._check_foreground_window()
 
-                if window_info:
-                    # 检查窗口是否变化
-                    if self._is_window_changed(window_info):
-                        # 记录之前的窗口活动
-                        if self._current_window and self._window_start_time:
-                            self._record_window_activity()
+            if self._stop_event.wait(self.check_interval):
+                break
 
-                        # 更新当前窗口
-                        self._current_window = window_info
-                        self._window_start_time = datetime.now()
+    def _check_foreground_window(self):
+        """检查前台窗口，发生变化时记录上一个窗口的活动"""
+        try:
+            window_info = self._get_active_window_info()
+
+            if window_info:
+                # 检查窗口是否变化
+                if self._is_window_changed(window_info):
+                    # 记录之前的窗口活动
+                    if self._current_window and self._window_start_time:
+                        self._record_window_activity()
 
-            except Exception as e:
-                # 忽略临时错误（如窗口快速切换）
-                pass
+                    # 更新当前窗口
+                    self._current_window = window_info
+                    self._window_start_time = datetime.now()
 
-            time.sleep(self.check_interval)
+        except Exception as e:
+            # 忽略临时错误（如窗口快速切换）
+            pass
 
     def _get_active_window_info(self) -> Optional[dict]:
         """获取当前活动窗口信息"""
@@ -98,11 +251,7 @@ class WindowMonitor:
             _, pid = win32process.GetWindowThreadProcessId(hwnd)
 
             # 获取进程名称
-            try:
-                process = psutil.Process(pid)
-                process_name = process.name()
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                process_name = "Unknown"
+            process_name = self._get_process_name(pid)
 
             return {
                 "hwnd": hwnd,
@@ -114,6 +263,44 @@ class WindowMonitor:
         except Exception:
             return None
 
+    def _get_process_name(self, pid: int) -> str:
+        """获取进程名称（按 pid 做 LRU 缓存）"""
+        kernel32 = _kernel32()
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            # 进程已退出或无权限访问
+            return "Unknown"
+
+        try:
+            creation_time = wintypes.FILETIME()
+            exit_time = wintypes.FILETIME()
+            kernel_time = wintypes.FILETIME()
+            user_time = wintypes.FILETIME()
+            if not kernel32.GetProcessTimes(
+                handle, ctypes.byref(creation_time), ctypes.byref(exit_time),
+                ctypes.byref(kernel_time), ctypes.byref(user_time)
+            ):
+                return "Unknown"
+            create_time = (creation_time.dwHighDateTime << 32) | creation_time.dwLowDateTime
+
+            cached = self._process_name_cache.get(pid)
+            if cached and cached[0] == create_time:
+                self._process_name_cache.move_to_end(pid)
+                return cached[1]
+
+            buffer = ctypes.create_unicode_buffer(PROCESS_IMAGE_PATH_SIZE)
+            size = wintypes.DWORD(PROCESS_IMAGE_PATH_SIZE)
+            if not kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)):
+                return "Unknown"
+            process_name = os.path.basename(buffer.value)
+        finally:
+            kernel32.CloseHandle(handle)
+
+        self._process_name_cache[pid] = (create_time, process_name)
+        if len(self._process_name_cache) > PROCESS_NAME_CACHE_SIZE:
+            self._process_name_cache.popitem(last=False)
+        return process_name
+
     def _is_window_changed(self, new_window: dict) -> bool:
         """检查窗口是否变化"""
         if not self._current_window:
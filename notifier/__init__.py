@@ -1 +1 @@
-from .notification import Notifier
+from .notification import Notifier, get_notifier
@@ -1,21 +1,76 @@
 """
 桌面通知模块 - 发送通知并复制文案到剪贴板
 """
+import ctypes
+import os
 import subprocess
+import threading
 import webbrowser
+from ctypes import wintypes
+from functools import lru_cache
 from typing import Optional
+from xml.sax.saxutils import escape
 
 try:
-    from plyer import notification
-    PLYER_AVAILABLE = True
+    import winreg
+    WINREG_AVAILABLE = True
 except ImportError:
-    PLYER_AVAILABLE = False
-
-try:
-    from win10toast import ToastNotifier
-    WIN10TOAST_AVAILABLE = True
-except ImportError:
-    WIN10TOAST_AVAILABLE = False
+    WINREG_AVAILABLE = False
+
+# 剪贴板相关常量
+CF_UNICODETEXT = 13
+GMEM_MOVEABLE = 0x0002
+
+# 微信安装位置（注册表键），读取失败时再检查常见的安装路径
+WECHAT_REGISTRY_KEY = r"Software\Tencent\WeChat"
+WECHAT_DEFAULT_PATHS = (
+    r"C:\Program Files (x86)\Tencent\WeChat\WeChat.exe",
+    r"C:\Program Files\Tencent\WeChat\WeChat.exe",
+    r"D:\Program Files (x86)\Tencent\WeChat\WeChat.exe",
+    r"D:\Program Files\Tencent\WeChat\WeChat.exe",
+)
+
+# Windows 通知模板
+TOAST_TEMPLATE = """<toast>
+    <visual>
+        <binding template="ToastText02">
+            <text id="1">{title}</text>
+            <text id="2">{message}</text>
+        </binding>
+    </visual>
+</toast>"""
+
+
+# 通知后端在第一次发送通知时才导入，不拖慢程序启动
+@lru_cache(maxsize=None)
+def _toast_notifier_class():
+    """导入 win10toast 的 ToastNotifier，不可用时返回 None"""
+    try:
+        from win10toast import ToastNotifier
+    except ImportError:
+        return None
+    return ToastNotifier
+
+
+@lru_cache(maxsize=None)
+def _plyer_notification():
+    """导入 plyer 的通知接口，不可用时返回 None"""
+    try:
+        from plyer import notification
+    except ImportError:
+        return None
+    return notification
+
+
+@lru_cache(maxsize=None)
+def _winsdk_toast_api():
+    """导入 winsdk 的通知接口，不可用时返回 None"""
+    try:
+        from winsdk.windows.data.xml.dom import XmlDocument
+        from winsdk.windows.ui.notifications import ToastNotification, ToastNotificationManager
+    except ImportError:
+        return None
+    return XmlDocument, ToastNotification, ToastNotificationManager
 
 
 class Notifier:
@@ -23,9 +78,26 @@ class Notifier:
 
     def __init__(self):
         """初始化通知器"""
-        self.toaster = None
-        if WIN10TOAST_AVAILABLE:
-            self.toaster = ToastNotifier()
+        # 微信路径只在创建时查找一次
+        self._wechat_exe = self._find_wechat_exe()
+
+    @staticmethod
+    def _find_wechat_exe() -> Optional[str]:
+        """查找微信程序路径，找不到时返回 None"""
+        if WINREG_AVAILABLE:
+            try:
+                with winreg.OpenKey(winreg.HKEY_CURRENT_USER, WECHAT_REGISTRY_KEY) as key:
+                    install_path = winreg.QueryValueEx(key, "InstallPath")[0]
+                path = os.path.join(install_path, "WeChat.exe")
+                if os.path.exists(path):
+                    return path
+            except OSError:
+                pass
+
+        for path in WECHAT_DEFAULT_PATHS:
+            if os.path.exists(path):
+                return path
+        return None
 
     def send_notification(
         self,
@@ -47,28 +119,44 @@ class Notifier:
             是否发送成功
         """
         try:
-            if WIN10TOAST_AVAILABLE and self.toaster:
-                self.toaster.show_toast(
-                    title,
-                    message,
-                    duration=timeout,
-                    threaded=True
-                )
+            toaster_class = _toast_notifier_class()
+            # 每条通知单独创建 ToastNotifier：同一实例上一条通知未消失时
+            # show_toast 会返回 False 并丢弃新通知，此时改用后面的方式发送
+            if toaster_class and toaster_class().show_toast(
+                title,
+                message,
+                duration=timeout,
+                threaded=True
+            ):
                 return True
-            elif PLYER_AVAILABLE:
+
+            notification = _plyer_notification()
+            if notification:
                 notification.notify(
                     title=title,
                     message=message,
                     timeout=timeout
                 )
                 return True
-            else:
-                # 降级：使用PowerShell显示通知
-                return self._powershell_notify(title, message)
+
+            toast_api = _winsdk_toast_api()
+            if toast_api:
+                return self._winsdk_notify(toast_api, title, message)
+
+            # 降级：使用PowerShell显示通知
+            return self._powershell_notify(title, message)
         except Exception as e:
             print(f"发送通知失败: {e}")
             return False
 
+    def _winsdk_notify(self, toast_api: tuple, title: str, message: str) -> bool:
+        """使用 WinRT 接口在进程内发送Windows通知"""
+        XmlDocument, ToastNotification, ToastNotificationManager = toast_api
+        xml = XmlDocument()
+        xml.load_xml(TOAST_TEMPLATE.format(title=escape(title), message=escape(message)))
+        ToastNotificationManager.create_toast_notifier("DayReview").show(ToastNotification(xml))
+        return True
+
     def _powershell_notify(self, title: str, message: str) -> bool:
         """使用PowerShell发送Windows通知"""
         try:
@@ -121,21 +209,51 @@ class Notifier:
             pyperclip.copy(text)
             return True
         except ImportError:
-            # 使用PowerShell作为备选
+            # 直接调用剪贴板 API 作为备选
             try:
-                # 处理换行符
-                text = text.replace("\n", "`n")
-                subprocess.run(
-                    ["powershell", "-Command", f'Set-Clipboard -Value "{text}"'],
-                    capture_output=True,
-                    timeout=5
-                )
-                return True
+                return self._win32_copy(text)
             except Exception:
                 pass
 
         return False
 
+    def _win32_copy(self, text: str) -> bool:
+        """通过 Win32 剪贴板 API 写入 Unicode 文本"""
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        user32.OpenClipboard.argtypes = [wintypes.HWND]
+        user32.SetClipboardData.argtypes = [wintypes.UINT, wintypes.HANDLE]
+        user32.SetClipboardData.restype = wintypes.HANDLE
+        kernel32.GlobalAlloc.argtypes = [wintypes.UINT, ctypes.c_size_t]
+        kernel32.GlobalAlloc.restype = wintypes.HGLOBAL
+        kernel32.GlobalLock.argtypes = [wintypes.HGLOBAL]
+        kernel32.GlobalLock.restype = wintypes.LPVOID
+        kernel32.GlobalUnlock.argtypes = [wintypes.HGLOBAL]
+        kernel32.GlobalFree.argtypes = [wintypes.HGLOBAL]
+
+        data = text.encode("utf-16-le") + b"\x00\x00"
+        if not user32.OpenClipboard(None):
+            return False
+        try:
+            user32.EmptyClipboard()
+            handle = kernel32.GlobalAlloc(GMEM_MOVEABLE, len(data))
+            if not handle:
+                return False
+            pointer = kernel32.GlobalLock(handle)
+            if not pointer:
+                kernel32.GlobalFree(handle)
+                return False
+            ctypes.memmove(pointer, data, len(data))
+            kernel32.GlobalUnlock(handle)
+
+            # 设置成功后内存归系统所有，失败时需要自行释放
+            if not user32.SetClipboardData(CF_UNICODETEXT, handle):
+                kernel32.GlobalFree(handle)
+                return False
+            return True
+        finally:
+            user32.CloseClipboard()
+
     def open_wechat(self) -> bool:
         """
         尝试打开微信
@@ -144,19 +262,9 @@ class Notifier:
             是否成功
         """
         try:
-            # 常见的微信安装路径
-            wechat_paths = [
-                r"C:\Program Files (x86)\Tencent\WeChat\WeChat.exe",
-                r"C:\Program Files\Tencent\WeChat\WeChat.exe",
-                r"D:\Program Files (x86)\Tencent\WeChat\WeChat.exe",
-                r"D:\Program Files\Tencent\WeChat\WeChat.exe",
-            ]
-
-            import os
-            for path in wechat_paths:
-                if os.path.exists(path):
-                    subprocess.Popen([path])
-                    return True
+            if self._wechat_exe:
+                subprocess.Popen([self._wechat_exe])
+                return True
 
             # 尝试通过协议打开
             webbrowser.open("weixin://")
@@ -201,6 +309,20 @@ class Notifier:
         return notify_success and copy_success
 
 
+_NOTIFIER_SINGLETON: Optional[Notifier] = None
+_NOTIFIER_LOCK = threading.Lock()
+
+
+def get_notifier() -> Notifier:
+    """获取全局共享的通知器"""
+    global _NOTIFIER_SINGLETON
+    if _NOTIFIER_SINGLETON is None:
+        with _NOTIFIER_LOCK:
+            if _NOTIFIER_SINGLETON is None:
+                _NOTIFIER_SINGLETON = Notifier()
+    return _NOTIFIER_SINGLETON
+
+
 def show_daily_report_notification(
     wechat_post: str,
     mood_score: float,
@@ -216,7 +338,7 @@ def show_daily_report_notification(
         stress_score: 压力指数
         summary: 今日总结
     """
-    notifier = Notifier()
+    notifier = get_notifier()
 
     title = "📊 今日活动报告"
     message = f"心情: {'😊' * int(mood_score / 2)} ({mood_score}/10)\n"
@@ -9,15 +9,29 @@ from datetime import datetime
 # 添加项目路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-try:
-    import pystray
-    from PIL import Image, ImageDraw
-    TRAY_AVAILABLE = True
-except ImportError:
-    TRAY_AVAILABLE = False
-    print("警告: pystray 或 Pillow 未安装，无法使用系统托盘")
-
 from DayReview.main import ActivityMonitorApp
+from DayReview.notifier import get_notifier
+
+# 预先渲染好的托盘图标
+ICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icon.png")
+
+# pystray 和 Pillow 在 TrayApp.run() 中才导入
+pystray = None
+Image = None
+
+
+def _import_tray_modules() -> bool:
+    """导入系统托盘依赖，返回是否可用"""
+    global pystray, Image
+    if pystray is None:
+        try:
+            import pystray as _pystray
+            from PIL import Image as _Image
+        except ImportError:
+            print("警告: pystray 或 Pillow 未安装，无法使用系统托盘")
+            return False
+        pystray, Image = _pystray, _Image
+    return True
 
 
 class TrayApp:
@@ -26,10 +40,22 @@ class TrayApp:
     def __init__(self):
         """初始化托盘应用"""
         self.app = ActivityMonitorApp()
+        self.notifier = get_notifier()
         self.icon = None
 
     def create_icon_image(self) -> 'Image':
-        """创建托盘图标"""
+        """加载托盘图标，图标文件缺失时现场绘制"""
+        try:
+            image = Image.open(ICON_PATH)
+            image.load()
+            return image
+        except OSError:
+            return self.draw_icon_image()
+
+    def draw_icon_image(self) -> 'Image':
+        """绘制托盘图标（icon.png 即由此生成）"""
+        from PIL import ImageDraw
+
         # 创建一个简单的图标
         size = 64
         image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
@@ -96,7 +122,7 @@ class TrayApp:
         message += f"\n生产力: {prod['productivity_ratio']}%"
         message += f"\n活跃度: {stats['avg_activity_score']:.0f}"
 
-        self.app.notifier.send_notification(
+        self.notifier.send_notification(
             title="📊 今日活动统计",
             message=message,
             timeout=10
@@ -115,7 +141,7 @@ class TrayApp:
             self.app.window_monitor.stop()
             self.app.input_monitor.stop()
             self.app._running = False
-            self.app.notifier.send_notification(
+            self.notifier.send_notification(
                 "DayReview",
                 "监控已暂停",
                 timeout=3
@@ -124,7 +150,7 @@ class TrayApp:
             self.app._running = True
             self.app.window_monitor.start()
             self.app.input_monitor.start()
-            self.app.notifier.send_notification(
+            self.notifier.send_notification(
                 "DayReview",
                 "监控已恢复",
                 timeout=3
@@ -142,7 +168,7 @@ class TrayApp:
 
     def run(self):
         """运行托盘应用"""
-        if not TRAY_AVAILABLE:
+        if not _import_tray_modules():
             print("系统托盘不可用，使用命令行模式")
             from DayReview.main import main
             main()
@@ -160,7 +186,7 @@ class TrayApp:
         )
 
         # 显示启动通知
-        self.app.notifier.send_notification(
+        self.notifier.send_notification(
             "DayReview 已启动",
             "程序正在后台运行\n右键托盘图标查看选项",
             timeout=5
@@ -1,33 +1,105 @@
 """
 辅助函数模块
 """
-from datetime import datetime, timedelta
+from datetime import datetime, date, time, timedelta
+from functools import lru_cache
 import re
 from typing import Optional
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# sanitize_text 的默认过滤词（均已是小写）
+_DEFAULT_FILTERS: tuple[str, ...] = (
+    "password", "密码", "账号", "account",
+    "银行", "bank", "支付", "payment",
+)
+# 默认过滤词按长度降序排列并转义，导入时处理一次
+_DEFAULT_ESCAPED: tuple[str, ...] = tuple(
+    re.escape(keyword) for keyword in sorted(_DEFAULT_FILTERS, key=len, reverse=True)
+)
+
+
+@lru_cache(maxsize=32)
+def _compile_filters(filters: tuple[str, ...], ignore_case: bool = False) -> re.Pattern:
+    """
+    将过滤词（小写）合并为一个正则，同一组过滤词只编译一次
+
+    较长的过滤词排在前面，互相包含时优先整体替换较长的词。
+    默认区分大小写，用于匹配已转小写的文本；ignore_case 用于无法转小写匹配的文本。
+    """
+    keywords = sorted({keyword.lower() for keyword in filters}, key=len, reverse=True)
+    alternation = "|".join(re.escape(keyword) for keyword in keywords)
+    return re.compile(alternation, re.IGNORECASE if ignore_case else 0)
+
+
+@lru_cache(maxsize=32)
+def _build_filter_automaton(filters: tuple[str, ...]):
+    """将过滤词（小写）构建为 Aho-Corasick 自动机，没有有效过滤词时返回 None"""
+    keywords = {keyword.lower() for keyword in filters if keyword}
+    if not keywords:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, len(keyword))
+    automaton.make_automaton()
+    return automaton
+
+
+# 默认过滤词的匹配器在导入时构建，使用默认过滤词时不再查缓存
+_DEFAULT_COMPILED = re.compile("|".join(_DEFAULT_ESCAPED))
+_DEFAULT_COMPILED_IGNORECASE = re.compile("|".join(_DEFAULT_ESCAPED), re.IGNORECASE)
+_DEFAULT_AUTOMATON = _build_filter_automaton(_DEFAULT_FILTERS) if AHOCORASICK_AVAILABLE else None
+
+
+def _mask_spans(text: str, spans) -> str:
+    """将 text 中按起点排列的 (start, end) 区间替换为 [隐私]，跳过与已替换部分重叠的区间"""
+    parts = []
+    prev = 0
+    for start, end in spans:
+        if start < prev:
+            continue
+        parts.append(text[prev:start])
+        parts.append("[隐私]")
+        prev = end
+    parts.append(text[prev:])
+    return "".join(parts)
+
+
+# parse_window_title 移除的常见窗口标题后缀（浏览器最常见，排在前面）
+_WINDOW_TITLE_SUFFIXES = (
+    " - Google Chrome",
+    " - Mozilla Firefox",
+    " - Microsoft Edge",
+    " - Visual Studio Code",
+    " - PyCharm",
+    " | Microsoft Teams",
+    " - Notepad++",
+)
+
 
 def format_duration(seconds: int) -> str:
     """将秒数转换为可读的时长格式"""
     if seconds < 60:
         return f"{seconds}秒"
-    elif seconds < 3600:
-        minutes = seconds // 60
+    hours, remainder = divmod(seconds, 3600)
+    minutes = remainder // 60
+    if not hours:
         return f"{minutes}分钟"
-    else:
-        hours = seconds // 3600
-        minutes = (seconds % 3600) // 60
-        if minutes > 0:
-            return f"{hours}小时{minutes}分钟"
-        return f"{hours}小时"
+    if minutes:
+        return f"{hours}小时{minutes}分钟"
+    return f"{hours}小时"
 
 
 def format_minutes(minutes: int) -> str:
     """将分钟数转换为可读格式"""
     if minutes < 60:
         return f"{minutes}分钟"
-    hours = minutes // 60
-    remaining_minutes = minutes % 60
-    if remaining_minutes > 0:
+    hours, remaining_minutes = divmod(minutes, 60)
+    if remaining_minutes:
         return f"{hours}小时{remaining_minutes}分钟"
     return f"{hours}小时"
 
@@ -37,35 +109,75 @@ def sanitize_text(text: str, filter_keywords: list[str] = None) -> str:
     if not text:
         return ""
 
-    # 默认过滤词
-    default_filters = [
-        "password", "密码", "账号", "account",
-        "银行", "bank", "支付", "payment",
-    ]
+    filters = tuple(filter_keywords) if filter_keywords else None
+
+    # 在小写文本上匹配，按位置替换原文，匹配时无需逐字符折叠大小写
+    text_lower = text.lower()
+    if len(text_lower) != len(text):
+        # 少数 Unicode 字符转小写后长度会变，位置无法对应回原文
+        pattern = _compile_filters(filters, ignore_case=True) if filters else _DEFAULT_COMPILED_IGNORECASE
+        return pattern.sub("[隐私]", text)
+
+    if AHOCORASICK_AVAILABLE:
+        automaton = _build_filter_automaton(filters) if filters else _DEFAULT_AUTOMATON
+        if automaton is not None:
+            # 按起点升序、长度降序依次取不重叠的命中（最左最长），与合并正则的替换结果一致
+            hits = sorted((end - length + 1, -length) for end, length in automaton.iter(text_lower))
+            return _mask_spans(text, ((start, start - negative_length) for start, negative_length in hits))
+
+    pattern = _compile_filters(filters) if filters else _DEFAULT_COMPILED
+
+    # 一次扫描找出所有过滤词
+    return _mask_spans(text, (match.span() for match in pattern.finditer(text_lower)))
 
-    filters = filter_keywords or default_filters
 
-    result = text
-    for keyword in filters:
-        # 不区分大小写替换
-        pattern = re.compile(re.escape(keyword), re.IGNORECASE)
-        result = pattern.sub("[隐私]", result)
+# 日期范围缓存：(日期, 昨天0点, 今天0点, 明天0点, 对应的三个 Unix 时间戳)，跨过0点后重新计算
+_DayRange = tuple[date, datetime, datetime, datetime, int, int, int]
+_day_range_cache: Optional[_DayRange] = None
 
-    return result
+
+def _get_day_range() -> _DayRange:
+    """获取当天的日期范围缓存"""
+    global _day_range_cache
+    today_date = date.today()
+    cached = _day_range_cache
+    if cached is not None and cached[0] == today_date:
+        return cached
+
+    # 直接由日期组合出0点，不必取当前时间再替换时分秒
+    today = datetime.combine(today_date, time.min)
+    yesterday = today - timedelta(days=1)
+    tomorrow = today + timedelta(days=1)
+    cached = (
+        today_date, yesterday, today, tomorrow,
+        int(yesterday.timestamp()), int(today.timestamp()), int(tomorrow.timestamp()),
+    )
+    _day_range_cache = cached
+    return cached
 
 
 def get_today_range() -> tuple[datetime, datetime]:
     """获取今天的时间范围"""
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    tomorrow = today + timedelta(days=1)
-    return today, tomorrow
+    cached = _get_day_range()
+    return cached[2], cached[3]
 
 
 def get_yesterday_range() -> tuple[datetime, datetime]:
     """获取昨天的时间范围"""
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    yesterday = today - timedelta(days=1)
-    return yesterday, today
+    cached = _get_day_range()
+    return cached[1], cached[2]
+
+
+def get_today_range_epoch() -> tuple[int, int]:
+    """获取今天的时间范围（Unix 时间戳，[开始, 结束)）"""
+    cached = _get_day_range()
+    return cached[5], cached[6]
+
+
+def get_yesterday_range_epoch() -> tuple[int, int]:
+    """获取昨天的时间范围（Unix 时间戳，[开始, 结束)）"""
+    cached = _get_day_range()
+    return cached[4], cached[5]
 
 
 def parse_window_title(title: str) -> Optional[str]:
@@ -73,21 +185,11 @@ def parse_window_title(title: str) -> Optional[str]:
     if not title:
         return None
 
-    # 移除常见的后缀
-    suffixes_to_remove = [
-        " - Google Chrome",
-        " - Mozilla Firefox",
-        " - Microsoft Edge",
-        " - Visual Studio Code",
-        " - PyCharm",
-        " | Microsoft Teams",
-        " - Notepad++",
-    ]
-
+    # 按顺序移除常见的后缀（循环外绑定方法，循环内不再查找属性）
+    removesuffix = str.removesuffix
     result = title
-    for suffix in suffixes_to_remove:
-        if result.endswith(suffix):
-            result = result[:-len(suffix)]
+    for suffix in _WINDOW_TITLE_SUFFIXES:
+        result = removesuffix(result, suffix)
 
     return result.strip()
 
@@ -95,13 +197,90 @@ def parse_window_title(title: str) -> Optional[str]:
 def calculate_activity_score(keyboard_count: int, mouse_count: int) -> float:
     """计算活跃度分数 (0-100)"""
     # 假设每分钟键盘100次+鼠标50次为满分活跃
-    keyboard_score = min(keyboard_count / 100, 1) * 60  # 键盘占60%
-    mouse_score = min(mouse_count / 50, 1) * 40  # 鼠标占40%
-    return keyboard_score + mouse_score
+    keyboard_ratio = 1.0 if keyboard_count >= 100 else keyboard_count * 0.01
+    mouse_ratio = 1.0 if mouse_count >= 50 else mouse_count * 0.02
+    return keyboard_ratio * 60 + mouse_ratio * 40  # 键盘占60%，鼠标占40%
+
+
+def _activity_scores_loop(keyboard, mouse, out):
+    """批量计算活跃度分数的数组循环（与 calculate_activity_score 算式相同，可被 Numba 编译）"""
+    for i in range(out.shape[0]):
+        keyboard_ratio = 1.0 if keyboard[i] >= 100 else keyboard[i] * 0.01
+        mouse_ratio = 1.0 if mouse[i] >= 50 else mouse[i] * 0.02
+        out[i] = keyboard_ratio * 60 + mouse_ratio * 40
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """首次批量计算时才导入 NumPy，不可用时返回 None"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+@lru_cache(maxsize=None)
+def _activity_scores_kernel():
+    """安装了 Numba 时返回编译后的数组循环，否则返回 None（首次批量计算时才导入 Numba）"""
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    # cache=True: 编译结果缓存到磁盘，之后启动无需重新编译
+    return njit(cache=True)(_activity_scores_loop)
+
+
+def calculate_activity_scores(keyboard_counts, mouse_counts):
+    """
+    批量计算活跃度分数 (0-100)，与 calculate_activity_score 逐个计算的结果一致
+
+    Args:
+        keyboard_counts: 各时段的键盘次数
+        mouse_counts: 各时段的鼠标次数
+
+    Returns:
+        各时段的分数列表（无论是否安装 NumPy 都返回 list）
+    """
+    np = _numpy()
+    if np is None:
+        return [
+            calculate_activity_score(keyboard_count, mouse_count)
+            for keyboard_count, mouse_count in zip(keyboard_counts, mouse_counts)
+        ]
+
+    keyboard = np.asarray(keyboard_counts, dtype=np.float64)
+    mouse = np.asarray(mouse_counts, dtype=np.float64)
+
+    kernel = _activity_scores_kernel()
+    if kernel is None:
+        return (np.minimum(keyboard * 0.01, 1) * 60 + np.minimum(mouse * 0.02, 1) * 40).tolist()
+
+    # 编译后的循环一次处理整批数据，调用开销分摊到每个样本上可以忽略
+    keyboard, mouse = np.broadcast_arrays(keyboard, mouse)
+    out = np.empty(keyboard.shape)
+    kernel(np.ravel(keyboard), np.ravel(mouse), out.reshape(-1))
+    return out.tolist()
+
+
+@lru_cache(maxsize=64)
+def _stars_table(max_stars: int) -> tuple[str, ...]:
+    """预先生成 0 到 max_stars 颗星的全部显示字符串"""
+    return tuple("⭐" * filled + "☆" * (max_stars - filled) for filled in range(max_stars + 1))
 
 
 def stars_display(score: float, max_score: float = 10, max_stars: int = 5) -> str:
     """将分数转换为星级显示"""
+    table = _stars_table(max_stars)
+    if max_score <= 0:
+        return table[0]
+
+    if isinstance(score, int) and isinstance(max_score, int):
+        # 整数分数直接用整数运算，不经过浮点（如 57/100*100 得 56.99...）
+        filled_stars = score * max_stars // max_score
+        return table[0 if filled_stars < 0 else min(filled_stars, max_stars)]
+
+    # 截断到 [0, 1]，超出范围的分数按 0 星或满星显示，NaN 按 0 星
     ratio = score / max_score
-    filled_stars = int(ratio * max_stars)
-    return "⭐" * filled_stars + "☆" * (max_stars - filled_stars)
+    ratio = 0.0 if not ratio > 0 else (1.0 if ratio > 1 else ratio)
+    return table[int(ratio * max_stars)]